@@ -1,6 +1,5 @@
 # soggetto.py
 
-import re
 import time
 from sound import audio_sequence
 
@@ -20,10 +19,27 @@ NOTE_MAP = {
   'u': 'G'
 }
 
+VOWELS = 'aeiou'
+
+# Byte tables mapping vowels in either case to their index and
+# deleting every other byte
+_VOWEL_TBL = bytes.maketrans(
+  (VOWELS + VOWELS.upper()).encode('ascii'),
+  bytes(range(len(VOWELS))) * 2
+)
+_NON_VOWELS = bytes(
+  c for c in range(256) if chr(c).lower() not in VOWELS
+)
+
+# Encodings ordered by vowel index
+_SOLFEGE_TBL = tuple(SOLFEGE_MAP[v] for v in VOWELS)
+_NOTE_TBL = tuple(NOTE_MAP[v] for v in VOWELS)
+
 def encode_string(text):
   """Enocdes the text in music using the simple soggetto cavato
   method from the 16th century 'soggetto cavato dalle vocali di
-  queste parole.' 
+  queste parole.' Only the ASCII vowels a, e, i, o and u are
+  encoded, in either case.
 
   Prameters:
     text (str): The text to encode in music.
@@ -33,13 +49,12 @@ def encode_string(text):
     notes (list(str)): The note values for the encoding (e.g. 'C').
   """
 
-  # extract vowels from text
-  vowel_pattern = r'[^AEIOU]'
-  vowels = re.sub(vowel_pattern, '', text, flags=re.IGNORECASE).lower()
+  # extract vowel indices from text, non-ascii characters are never vowels
+  vowels = text.encode('ascii', 'ignore').translate(_VOWEL_TBL, _NON_VOWELS)
 
-  # encode solfege and notes
-  solfege = [SOLFEGE_MAP[v] for v in vowels]
-  notes = [NOTE_MAP[v] for v in vowels]
+  # encode solfege and notes, indexing the tables from C via map
+  solfege = list(map(_SOLFEGE_TBL.__getitem__, vowels))
+  notes = list(map(_NOTE_TBL.__getitem__, vowels))
 
   return solfege, notes
 
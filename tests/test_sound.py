@@ -0,0 +1,43 @@
+# test_sound.py
+
+import os
+import sys
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'soggetto'))
+
+from sound import SoundWave
+
+
+def test_pow_direct_path_promotes_int16():
+  f = SoundWave(44100, np.full(44100, 20000, dtype=np.int16))
+  g = SoundWave(44100, np.full(10, 20000, dtype=np.int16))
+
+  conv = (f ** g).samples
+
+  assert len(conv) == 44100 + 10 - 1
+  assert conv.dtype.kind == 'f'
+  assert np.allclose(conv[:3], [4e8, 8e8, 1.2e9])
+  assert np.allclose(conv, np.convolve(f.samples.astype(np.float64), g.samples.astype(np.float64)))
+
+
+def test_export_silent_wave(tmp_path):
+  path = str(tmp_path / 'silent.wav')
+
+  SoundWave(44100, np.zeros(100, dtype=np.float32)).export(path)
+
+  with wave.open(path, 'rb') as f:
+    frames = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+  assert np.array_equal(frames, np.zeros(100, dtype=np.int16))
+
+
+def test_export_accepts_path(tmp_path):
+  path = tmp_path / 'note.wav'
+
+  SoundWave(44100, np.array([0.5, -1.0], dtype=np.float32)).export(path)
+
+  with wave.open(str(path), 'rb') as f:
+    frames = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+  assert np.array_equal(frames, [16383, -32767])